@@ -3,10 +3,27 @@ import sys
 import click
 
 from .core.click_factory import build_cli
+from .core.dispatch import registry_version
 from .core.errors import ErrorCode
 from .core.plugins import load_plugins
 from .core.results import ResultObject
 
+# pkg -> (registry version it was built at, CLI); rebuilt when the registry changes.
+_CLI_CACHE: dict[str, tuple[int, click.Group]] = {}
+
+
+def _get_cli(pkg: str) -> click.Group:
+    """Load plugins and reuse the built CLI until the registry changes."""
+
+    load_plugins(f"{pkg}.plugins")
+    version = registry_version()
+    cached = _CLI_CACHE.get(pkg)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    cli = build_cli(pkg, return_results=True)
+    _CLI_CACHE[pkg] = (version, cli)
+    return cli
+
 
 def run(argv: list[str] | None = None) -> tuple[ResultObject, int]:
     """Programmatic entry point returning structured results and exit code."""
@@ -14,8 +31,7 @@ def run(argv: list[str] | None = None) -> tuple[ResultObject, int]:
     argv = argv if argv is not None else sys.argv[1:]
 
     pkg = __package__ or __name__.split(".")[0]
-    load_plugins(f"{pkg}.plugins")
-    cli = build_cli(pkg, return_results=True)
+    cli = _get_cli(pkg)
 
     try:
         results, code = cli.main(args=argv, prog_name=pkg, standalone_mode=False)
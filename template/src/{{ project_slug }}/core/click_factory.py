@@ -1,75 +1,140 @@
-import collections.abc
-import inspect
-import io
+import codecs
 import json
-from enum import Enum
-from types import UnionType
-from typing import IO, Any, Callable, Union, cast, get_args, get_origin, get_type_hints
+import sys
+from typing import Any, Callable, Iterable
 
 import click
 
-from .dispatch import COMMAND_META, DISPATCH
+from .dispatch import COMMAND_META, Handler, ParamSpec, param_plan, sorted_dispatch
 from .errors import ErrorCode
 from .results import ResultObject
 
+try:
+    import orjson
+
+    # Send datetimes and dataclasses through default=str like the stdlib path.
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+except ImportError:  # optional speedup for --output json
+    orjson = None
+
+
+def _dumps(obj: Any, *, ascii_only: bool = False) -> bytes:
+    """Serialize ``obj`` to JSON bytes, preferring orjson when it is installed.
+
+    ``ascii_only`` forces the stdlib encoder, whose ``\\uXXXX`` escapes keep the
+    output representable in any stream encoding.
+    """
+
+    if orjson is not None and not ascii_only:
+        try:
+            return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+    return json.dumps(obj, default=str).encode()
+
+
+_Invoker = Callable[[ResultObject, dict[str, Any]], None]
+
 
 def _flag(name: str) -> str:
     return "--" + name.replace("_", "-")
 
 
-def _unwrap_optional(ann: Any) -> Any:
-    """Return the non-None side of Optional/Union annotations when possible."""
+def _click_param(spec: ParamSpec) -> click.Parameter:
+    if spec.positional:
+        return click.Argument([spec.name], type=spec.click_type)
+    if spec.is_bool:
+        return click.Option([_flag(spec.name)], is_flag=True, default=spec.default)
+    if spec.is_io:
+        return click.Option(
+            [_flag(spec.name)],
+            type=spec.click_type,
+            required=spec.required,
+            default=spec.default,
+            metavar="PATH",
+        )
+    return click.Option(
+        [_flag(spec.name)],
+        type=spec.click_type,
+        required=spec.required,
+        default=spec.default,
+        show_default=not spec.required,
+    )
 
-    origin = get_origin(ann)
-    if origin not in (Union, UnionType):
-        return ann
 
-    args = get_args(ann)
-    non_none = [a for a in args if a is not type(None)]
-    if len(non_none) == 1 and len(non_none) != len(args):
-        return non_none[0]
-    return ann
+def _unexpected_kwargs(names: Iterable[str]) -> TypeError:
+    return TypeError(f"unexpected keyword argument(s): {', '.join(sorted(names))}")
 
 
-def _is_io(ann: Any) -> bool:
-    base = _unwrap_optional(ann)
+def _make_invoker(fn: Handler, plan: tuple[ParamSpec, ...]) -> _Invoker:
+    """Return a ``(results, kwargs)`` shim specialized for the handler's shape."""
 
-    if isinstance(base, str):
-        normalized = base.replace("typing.", "")
-        if normalized == "IO" or normalized.startswith("IO["):
-            return True
-        return False
+    if not plan:
+        # results-only handler: nothing to coerce, any kwarg is unexpected
+        def invoke_bare(results: ResultObject, kwargs: dict[str, Any]) -> None:
+            if kwargs:
+                raise _unexpected_kwargs(kwargs)
+            fn(results)
 
-    origin = get_origin(base)
-    # collections.abc may not define IO in all environments; access it safely.
-    abc_io = getattr(collections.abc, "IO", None)
-    if base in (IO, io.IOBase, io.TextIOBase):
-        return True
-    if origin is not None and (origin is IO or (abc_io is not None and origin is abc_io)):
-        return True
+        return invoke_bare
+
+    enum_coerce = tuple((s.name, s.enum_cls) for s in plan if s.enum_cls is not None)
+    allowed = frozenset(s.name for s in plan)
+
+    def invoke(results: ResultObject, kwargs: dict[str, Any]) -> None:
+        for name, enum_cls in enum_coerce:
+            value = kwargs.get(name)
+            if value is not None and not isinstance(value, enum_cls):
+                kwargs[name] = enum_cls(value)
+        if not kwargs.keys() <= allowed:
+            raise _unexpected_kwargs(kwargs.keys() - allowed)
+        fn(results, **kwargs)
+
+    return invoke
+
+
+def _is_utf8(stream: Any) -> bool:
+    encoding = getattr(stream, "encoding", None)
+    if not encoding:
+        return False
     try:
-        return isinstance(base, type) and issubclass(base, io.IOBase)
-    except TypeError:
+        return codecs.lookup(encoding).name == "utf-8"
+    except LookupError:
         return False
 
 
 def _render(results: ResultObject, *, output: str, quiet: bool) -> None:
     if quiet:
         return
+    stream = sys.stdout
     if output == "json":
-        click.echo(json.dumps({"ok": results.ok, "events": results.events}, default=str))
+        payload = {"ok": results.ok, "events": [ev.to_dict() for ev in results.events]}
+        buffer = getattr(stream, "buffer", None)
+        if buffer is not None and _is_utf8(stream):
+            stream.flush()  # keep ordering with any text already written
+            buffer.write(_dumps(payload) + b"\n")
+            buffer.flush()
+            return
+        # No binary layer, or one we may not write UTF-8 to: go through the text layer.
+        click.echo(_dumps(payload, ascii_only=True).decode("ascii"))
         return
 
+    if not results.events:
+        return
+    lines: list[str] = []
     for ev in results.events:
-        kind = ev.get("kind", "event")
-        code = ev.get("code")
-        code_num = ev.get("code_num")
-        code_part = f" ({code}:{code_num})" if code or code_num is not None else ""
-        msg = ev.get("message")
-        details_map = ev.get("details", {})
-        tail = " ".join(f"{k}={v}" for k, v in details_map.items())
-        line = f"[{kind}]" + code_part + (f" {msg}" if msg else "") + (f" {tail}" if tail else "")
-        click.echo(line)
+        parts = [f"[{ev.kind}]"]
+        if ev.code or ev.code_num is not None:
+            parts.append(f" ({ev.code}:{ev.code_num})")
+        if ev.message:
+            parts.append(f" {ev.message}")
+        if ev.details:
+            parts.append(" " + " ".join([f"{k}={v}" for k, v in ev.details.items()]))
+        lines.append("".join(parts))
+    # One echo for all lines; click strips ANSI styling when stdout is not a TTY.
+    click.echo("\n".join(lines))
 
 
 def _exit_code_from_events(results: ResultObject, *, bug: bool) -> int:
@@ -81,17 +146,13 @@ def _exit_code_from_events(results: ResultObject, *, bug: bool) -> int:
     # Determine exit code from numeric ErrorCode ranges.
     # 1xxx-2xxx: input/config -> 1
     # 3xxx-5xxx: env/plugin/domain -> 2
-    code_nums: list[int] = []
+    # Any 1xxx-2xxx error wins; otherwise (including no numeric codes) -> 2.
     for ev in results.events:
-        if ev.get("kind") != "error":
+        if ev.kind != "error":
             continue
-        code_num = ev.get("code_num")
-        if isinstance(code_num, int):
-            code_nums.append(code_num)
-    if not code_nums:
-        return 2
-    if any(1000 <= n < 3000 for n in code_nums):
-        return 1
+        code_num = ev.code_num
+        if code_num is not None and 1000 <= code_num < 3000:
+            return 1
     return 2
 
 
@@ -111,52 +172,22 @@ def build_cli(prog_name: str, *, return_results: bool = False) -> click.Group:
         ctx.obj["output"] = output
         ctx.obj["quiet"] = quiet
 
-    for verb, fn in sorted(DISPATCH.items()):
-        meta = COMMAND_META.get(verb)
-        help_text = meta.summary if meta else None
-        sig = inspect.signature(fn)
-        try:
-            hints = get_type_hints(fn)
-        except Exception:
-            hints = {}
-        params = list(sig.parameters.values())
-
-        # enforce: fn(results, *, ...)
-        if not params:
-            raise RuntimeError(f"{verb}: missing results parameter")
-        if params[0].kind not in (
-            inspect.Parameter.POSITIONAL_ONLY,
-            inspect.Parameter.POSITIONAL_OR_KEYWORD,
-        ):
-            raise RuntimeError(f"{verb}: first param must be positional 'results'")
-        for p in params[1:]:
-            if p.kind is not inspect.Parameter.KEYWORD_ONLY:
-                raise RuntimeError(f"{verb}: params after results must be keyword-only")
-
-        def make_callback(
-            fn: Callable[..., Any],
-            sig: inspect.Signature,
-            enum_params: dict[str, type[Enum]],
-        ):
+    for verb, fn in sorted_dispatch():
+        meta = COMMAND_META[verb]
+        plan = param_plan(verb)
+
+        def make_callback(invoke: _Invoker):
             def callback(**kwargs: Any) -> None:
-                ctx = click.get_current_context()
-                ctx_obj = cast(dict[str, Any], ctx.obj or {})
-                output = str(ctx_obj.get("output", "text"))
-                quiet = bool(ctx_obj.get("quiet", False))
+                # root() always populates ctx.obj before a subcommand runs
+                ctx_obj = click.get_current_context().obj
+                output = ctx_obj["output"]
+                quiet = ctx_obj["quiet"]
 
                 results = ResultObject()
                 bug = False
 
                 try:
-                    for name, enum_cls in enum_params.items():
-                        if (
-                            name in kwargs
-                            and kwargs[name] is not None
-                            and not isinstance(kwargs[name], enum_cls)
-                        ):
-                            kwargs[name] = enum_cls(kwargs[name])
-                    bound = sig.bind_partial(results, **kwargs)  # validates keyword binding
-                    fn(*bound.args, **bound.kwargs)
+                    invoke(results, kwargs)
                 except click.ClickException:
                     # user/usage/config error -> click exits 1
                     raise
@@ -180,82 +211,12 @@ def build_cli(prog_name: str, *, return_results: bool = False) -> click.Group:
 
             return callback
 
-        enum_params: dict[str, type[Enum]] = {}
-        cmd = click.Command(name=verb, callback=make_callback(fn, sig, enum_params), help=help_text)
-
-        positional_enabled = meta.positional if meta is not None else True
-        arg_params: list[click.Argument] = []
-        opt_params: list[click.Option] = []
-
-        # build parameters from keyword-only params
-        for p in params[1:]:
-            ann = hints.get(
-                p.name,
-                p.annotation if p.annotation is not inspect.Parameter.empty else str,
-            )
-            ann = _unwrap_optional(ann)
-            has_default = p.default is not inspect.Parameter.empty
-            default = None if not has_default else p.default
-            required = not has_default
-
-            if positional_enabled and required and ann is not bool:
-                if isinstance(ann, type) and issubclass(ann, Enum):
-                    enum_params[p.name] = ann
-                    arg_type: click.ParamType = click.Choice(
-                        [m.value for m in ann], case_sensitive=False
-                    )
-                elif _is_io(ann):
-                    arg_type = click.File("r")
-                else:
-                    arg_type = (
-                        click.INT if ann is int else click.FLOAT if ann is float else click.STRING
-                    )
-
-                arg_params.append(click.Argument([p.name], type=arg_type))
-                continue
-
-            if ann is bool:
-                opt = click.Option(
-                    [_flag(p.name)], is_flag=True, default=bool(default) if has_default else False
-                )
-                opt_params.append(opt)
-                continue
-
-            if _is_io(ann):
-                opt = click.Option(
-                    [_flag(p.name)],
-                    type=click.File("r"),
-                    required=not has_default,
-                    default=default,
-                    metavar="PATH",
-                )
-                opt_params.append(opt)
-                continue
-
-            if isinstance(ann, type) and issubclass(ann, Enum):
-                choices = [m.value for m in ann]
-                enum_params[p.name] = ann
-                opt = click.Option(
-                    [_flag(p.name)],
-                    type=click.Choice(choices, case_sensitive=False),
-                    required=not has_default,
-                    default=(default.value if has_default and default is not None else None),
-                    show_default=has_default,
-                )
-                opt_params.append(opt)
-                continue
-
-            ctype = click.INT if ann is int else click.FLOAT if ann is float else click.STRING
-            opt = click.Option(
-                [_flag(p.name)],
-                type=ctype,
-                required=not has_default,
-                default=default,
-                show_default=has_default,
-            )
-            opt_params.append(opt)
-
-        cmd.params.extend(arg_params + opt_params)
+        cmd = click.Command(
+            name=verb, callback=make_callback(_make_invoker(fn, plan)), help=meta.summary
+        )
+        # positional arguments first, then options
+        cmd.params.extend(_click_param(s) for s in plan if s.positional)
+        cmd.params.extend(_click_param(s) for s in plan if not s.positional)
 
         root.add_command(cmd)
 
@@ -1,10 +1,31 @@
+import collections.abc
+import inspect
+import io
 from dataclasses import dataclass
-from typing import Any, Callable
+from enum import Enum
+from types import UnionType
+from typing import IO, Any, Callable, Union, get_args, get_origin, get_type_hints
+
+import click
 
 Handler = Callable[..., Any]
 DISPATCH: dict[str, Handler] = {}
 
 
+@dataclass(frozen=True)
+class ParamSpec:
+    """Click-facing description of one keyword-only handler parameter."""
+
+    name: str
+    positional: bool
+    click_type: click.ParamType | None
+    default: Any
+    required: bool
+    enum_cls: type[Enum] | None
+    is_io: bool
+    is_bool: bool
+
+
 @dataclass(frozen=True)
 class CommandMeta:
     verb: str
@@ -15,11 +36,159 @@ class CommandMeta:
 
 COMMAND_META: dict[str, CommandMeta] = {}
 
+# Built on first use rather than at registration: a handler's annotations may
+# name things defined further down its plugin module.
+_PARAM_PLANS: dict[str, tuple[ParamSpec, ...]] = {}
+
+# collections.abc may not define IO in all environments; access it safely.
+_ABC_IO = getattr(collections.abc, "IO", None)
+_IO_SENTINELS: tuple[Any, ...] = (IO, io.IOBase, io.TextIOBase) + (
+    (_ABC_IO,) if _ABC_IO is not None else ()
+)
+
+# Bumped on every registration so callers can cache views of the registry.
+_registry_version = 0
+_sorted_dispatch: list[tuple[str, Handler]] | None = None
+
 
 class RegistrationError(RuntimeError):
     pass
 
 
+def _unwrap_optional(ann: Any) -> Any:
+    """Return the non-None side of Optional/Union annotations when possible."""
+
+    origin = get_origin(ann)
+    if origin not in (Union, UnionType):
+        return ann
+
+    args = get_args(ann)
+    non_none = [a for a in args if a is not type(None)]
+    if len(non_none) == 1 and len(non_none) != len(args):
+        return non_none[0]
+    return ann
+
+
+def _is_io(ann: Any) -> bool:
+    base = _unwrap_optional(ann)
+
+    if isinstance(base, str):
+        normalized = base.replace("typing.", "")
+        return normalized == "IO" or normalized.startswith("IO[")
+
+    if base in _IO_SENTINELS or get_origin(base) in _IO_SENTINELS:
+        return True
+    try:
+        return isinstance(base, type) and issubclass(base, io.IOBase)
+    except TypeError:
+        return False
+
+
+def _scalar_type(ann: Any) -> click.ParamType:
+    return click.INT if ann is int else click.FLOAT if ann is float else click.STRING
+
+
+def _check_signature(verb: str, fn: Handler) -> None:
+    """Enforce the ``fn(results, *, ...)`` handler shape."""
+
+    params = list(inspect.signature(fn).parameters.values())
+    if not params:
+        raise RegistrationError(f"{verb}: missing results parameter")
+    if params[0].kind not in (
+        inspect.Parameter.POSITIONAL_ONLY,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    ):
+        raise RegistrationError(f"{verb}: first param must be positional 'results'")
+    for p in params[1:]:
+        if p.kind is not inspect.Parameter.KEYWORD_ONLY:
+            raise RegistrationError(f"{verb}: params after results must be keyword-only")
+
+
+def _build_param_plan(fn: Handler, positional: bool) -> tuple[ParamSpec, ...]:
+    """Reflect over a (signature-checked) handler and describe its CLI parameters."""
+
+    params = list(inspect.signature(fn).parameters.values())
+    try:
+        hints = get_type_hints(fn)
+    except Exception:
+        hints = {}
+
+    plan: list[ParamSpec] = []
+    for p in params[1:]:
+        ann = hints.get(
+            p.name,
+            p.annotation if p.annotation is not inspect.Parameter.empty else str,
+        )
+        ann = _unwrap_optional(ann)
+        has_default = p.default is not inspect.Parameter.empty
+        default = None if not has_default else p.default
+        is_bool = ann is bool
+        is_io = not is_bool and _is_io(ann)
+        enum_cls = ann if isinstance(ann, type) and issubclass(ann, Enum) else None
+
+        click_type: click.ParamType | None
+        if is_bool:
+            click_type = None
+            default = bool(default) if has_default else False
+        elif enum_cls is not None:
+            click_type = click.Choice([m.value for m in enum_cls], case_sensitive=False)
+            if isinstance(default, Enum):
+                default = default.value
+        elif is_io:
+            click_type = click.File("r")
+        else:
+            click_type = _scalar_type(ann)
+
+        plan.append(
+            ParamSpec(
+                name=p.name,
+                positional=positional and not has_default and not is_bool,
+                click_type=click_type,
+                default=default,
+                required=not has_default,
+                enum_cls=enum_cls,
+                is_io=is_io,
+                is_bool=is_bool,
+            )
+        )
+    return tuple(plan)
+
+
+def param_plan(verb: str) -> tuple[ParamSpec, ...]:
+    """Return the parameter plan for a registered verb, building it on first use.
+
+    Call this only once the handler's plugin module has finished importing, so
+    that annotations referring to later definitions resolve. Raises
+    RegistrationError if the handler does not have the ``fn(results, *, ...)``
+    shape; this happens here rather than at decoration time so the error is not
+    swallowed by plugin loading.
+    """
+
+    plan = _PARAM_PLANS.get(verb)
+    if plan is None:
+        _check_signature(verb, DISPATCH[verb])
+        plan = _PARAM_PLANS[verb] = _build_param_plan(DISPATCH[verb], COMMAND_META[verb].positional)
+    return plan
+
+
+def registry_version() -> int:
+    """Return a counter that changes whenever a handler is registered."""
+
+    return _registry_version
+
+
+def sorted_dispatch() -> list[tuple[str, Handler]]:
+    """Return registered (verb, handler) pairs sorted by verb.
+
+    The list is cached until the next registration; treat it as read-only.
+    """
+
+    global _sorted_dispatch
+    if _sorted_dispatch is None:
+        _sorted_dispatch = sorted(DISPATCH.items())
+    return _sorted_dispatch
+
+
 def command(
     verb: str | None = None,
     *,
@@ -37,6 +206,8 @@ def command(
     """
 
     def decorate(fn: Handler) -> Handler:
+        global _registry_version, _sorted_dispatch
+
         v = verb or fn.__name__
         doc = (fn.__doc__ or "").strip()
         s = summary or (doc.splitlines()[0].strip() if doc else "Run command")
@@ -52,6 +223,8 @@ def command(
         COMMAND_META[v] = CommandMeta(
             verb=v, summary=s, module=fn.__module__, positional=positional
         )
+        _registry_version += 1
+        _sorted_dispatch = None
         return fn
 
     return decorate
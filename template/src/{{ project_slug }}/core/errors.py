@@ -29,3 +29,7 @@ class ErrorCode(IntEnum):
     # 9xxx: bugs
     E_BUG_UNHANDLED = 9001
     E_BUG_ASSERT = 9002
+
+
+# (name, number) per member, so hot paths avoid enum descriptor lookups.
+CODE_CACHE: dict[ErrorCode, tuple[str, int]] = {c: (c.name, c.value) for c in ErrorCode}
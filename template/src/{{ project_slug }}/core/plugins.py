@@ -1,20 +1,34 @@
 import importlib
 import pkgutil
+from functools import lru_cache
 
 import click
 
+_LOADED: set[str] = set()
+
+
+@lru_cache(maxsize=None)
+def _plugin_modules(path: tuple[str, ...], prefix: str) -> tuple[str, ...]:
+    """Return the sorted non-package module names found on a package path."""
+
+    found = sorted(pkgutil.iter_modules(path, prefix=prefix), key=lambda x: x.name)
+    return tuple(m.name for m in found if not m.ispkg)
+
 
 def load_plugins(package: str) -> None:
     """Import all modules in a package to trigger decorator registration.
 
-    Import errors are reported but do not abort the CLI.
+    Import errors are reported but do not abort the CLI. Each package is
+    only walked once per process; repeat calls are no-ops.
     """
 
+    if package in _LOADED:
+        return
+
     pkg = importlib.import_module(package)
-    for m in sorted(pkgutil.iter_modules(pkg.__path__, prefix=f"{package}."), key=lambda x: x.name):
-        if m.ispkg:
-            continue
+    for name in _plugin_modules(tuple(pkg.__path__), f"{package}."):
         try:
-            importlib.import_module(m.name)
+            importlib.import_module(name)
         except Exception as e:
-            click.echo(f"Warning: plugin import failed: {m.name} ({e!r})", err=True)
+            click.echo(f"Warning: plugin import failed: {name} ({e!r})", err=True)
+    _LOADED.add(package)
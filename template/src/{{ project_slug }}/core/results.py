@@ -1,14 +1,49 @@
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Any, Dict, List, cast
+from typing import Any, NamedTuple
 
-from .errors import ErrorCode
+from .errors import CODE_CACHE, ErrorCode
 
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") so bursts of events format the prefix once.
+_TS_CACHE: tuple[int, str] = (-1, "")
 
-@dataclass
+
+def _utc_timestamp() -> str:
+    """Return the current UTC time as ISO-8601 with a trailing ``Z``."""
+
+    global _TS_CACHE
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    cached_sec, prefix = _TS_CACHE
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _TS_CACHE = (sec, prefix)
+    usec = ns // 1000
+    return f"{prefix}.{usec:06d}Z" if usec else f"{prefix}Z"
+
+
+class Event(NamedTuple):
+    """One structured event; ``details`` is None when the event has none."""
+
+    kind: str
+    message: str | None
+    code: str | None
+    code_num: int | None
+    ts: str
+    details: dict[str, Any] | None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the JSON output shape (``details`` is always a mapping)."""
+
+        d = self._asdict()
+        if d["details"] is None:
+            d["details"] = {}
+        return d
+
+
+@dataclass(slots=True)
 class ResultObject:
     ok: bool = True
-    events: List[Dict[str, Any]] = field(default_factory=lambda: cast(List[Dict[str, Any]], []))
+    events: list[Event] = field(default_factory=list)
 
     def add_event(
         self,
@@ -18,15 +53,9 @@ class ResultObject:
         code: ErrorCode | None = None,
         details: dict[str, Any] | None = None,
     ) -> None:
+        code_name, code_num = CODE_CACHE[code] if code is not None else (None, None)
         self.events.append(
-            {
-                "kind": kind,
-                "message": message,
-                "code": code.name if code is not None else None,
-                "code_num": int(code) if code is not None else None,
-                "ts": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-                "details": details or {},
-            }
+            Event(kind, message, code_name, code_num, _utc_timestamp(), details or None)
         )
 
     def fail(self, message: str, *, code: ErrorCode, details: dict[str, Any] | None = None) -> None:
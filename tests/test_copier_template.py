@@ -1,43 +1,101 @@
+import hashlib
 import importlib
+import importlib.util
 import json
 import shutil
-import subprocess
 import sys
 import textwrap
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import pytest
+
+copier = pytest.importorskip("copier")
+CliRunner = pytest.importorskip("click.testing").CliRunner
 
 ROOT = Path(__file__).resolve().parents[1]
 TEMPLATE_ROOT = ROOT
 
+_BASE_DATA: dict[str, str] = {
+    "description": "Test project",
+    "author": "Test Author",
+    "python_min": "3.11",
+    "use_entrypoints": "false",
+    "license_year": "2026",
+}
+
+# Substrings the rendered files must (or must not) contain.
+_SAMPLE_NAME = 'name = "sample_cli"'
+_SAMPLE_ENTRY_POINTS = '[project.entry-points."sample_cli.plugins"]'
+_NO_ENTRY_NAME = 'name = "no_entry"'
+_NO_ENTRY_ENTRY_POINTS = '[project.entry-points."no_entry.plugins"]'
+_UNRENDERED_SLUG = "{{ project_slug }}"
+_CLI_NEEDLES = ("load_plugins", ".plugins", "prog_name=pkg")
+
+Renderer = Callable[[dict[str, str]], Path]
+
+
+def _data_key(data: dict[str, str]) -> str:
+    return hashlib.sha1(json.dumps(sorted(data.items())).encode("utf-8")).hexdigest()[:16]
 
-def _run_copier(tmp_path: Path, data: dict[str, str]) -> Path:
-    dest = tmp_path / "output"
-    source = tmp_path / "source"
 
+@pytest.fixture(scope="session")
+def _template_cache_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("copier_cache")
+
+
+@pytest.fixture(scope="session")
+def _render_cache(_template_cache_dir: Path) -> Renderer:
+    """Render each distinct answer set once per session; return the cached project root."""
+
+    source = _template_cache_dir / "source"
     shutil.copytree(
         TEMPLATE_ROOT,
         source,
         ignore=shutil.ignore_patterns(".git", ".venv", "__pycache__", ".pytest_cache"),
     )
-    cmd = [
-        sys.executable,
-        "-m",
-        "copier",
-        "copy",
-        str(source),
-        str(dest),
-        "--force",
-        "--trust",
-    ]
-    for key, value in data.items():
-        cmd.extend(["--data", f"{key}={value}"])
-
-    subprocess.run(cmd, check=True, cwd=source)
-    return dest
+    rendered: dict[str, Path] = {}
+
+    def render(data: dict[str, str]) -> Path:
+        key = _data_key(data)
+        if key not in rendered:
+            dest = _template_cache_dir / key
+            copier.run_copy(
+                src_path=str(source),
+                dst_path=str(dest),
+                data=data,
+                defaults=True,
+                overwrite=True,
+                unsafe=True,
+                quiet=True,
+            )
+            rendered[key] = _project_root(dest)
+        return rendered[key]
+
+    return render
+
+
+def _copy_rendered(tmp_path: Path, data: dict[str, str], render: Renderer) -> Path:
+    """Copy the rendered project into ``tmp_path`` and return its root."""
+
+    # Tests add plugins to the rendered tree, so each one gets a private copy.
+    project_root = tmp_path / "output"
+    shutil.copytree(render(data), project_root)
+    return project_root
+
+
+def _cached_import(module: str, attr: str) -> Any:
+    """Fetch ``module.attr``, importing the module only if it is not loaded yet."""
+
+    mod = sys.modules.get(module)
+    if mod is None:
+        mod = importlib.import_module(module)
+    return getattr(mod, attr)
 
 
 def _read(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
+    return path.read_bytes().decode("utf-8")
 
 
 def _project_root(dest: Path) -> Path:
@@ -46,159 +104,173 @@ def _project_root(dest: Path) -> Path:
     return dest / "template"
 
 
-def _purge_modules(prefix: str) -> None:
-    for name in list(sys.modules):
-        if name.startswith(prefix):
-            sys.modules.pop(name, None)
+@pytest.fixture(scope="session")
+def hello_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A read-only five-byte input file shared by the ingest tests."""
 
+    path = tmp_path_factory.mktemp("fixtures") / "data.txt"
+    path.write_bytes(b"hello")
+    return path
 
-def test_template_renders_with_entrypoints(tmp_path: Path) -> None:
-    dest = _run_copier(
-        tmp_path,
-        {
-            "project_name": "Sample CLI",
-            "description": "Sample description",
-            "author": "Test Author",
-            "project_slug": "sample_cli",
-            "python_min": "3.11",
-            "use_entrypoints": "true",
-            "license_year": "2026",
-        },
-    )
 
-    project_root = _project_root(dest)
-    pyproject = _read(project_root / "pyproject.toml")
-    assert 'name = "sample_cli"' in pyproject
-    assert '[project.entry-points."sample_cli.plugins"]' in pyproject
+ProjectImporter = Callable[[Path, str], None]
 
-    cli = _read(project_root / "src" / "sample_cli" / "cli.py")
-    assert "{{ project_slug }}" not in cli
-    assert "load_plugins" in cli
-    assert ".plugins" in cli
-    assert "prog_name=pkg" in cli
 
-    assert (project_root / "README.md").exists()
-    assert (project_root / "LICENSE").exists()
+@pytest.fixture
+def use_project() -> Iterator[ProjectImporter]:
+    """Make a rendered project importable for one test and unload it afterwards."""
 
+    slugs: list[str] = []
+    before = frozenset(sys.modules)
 
-def test_template_renders_without_entrypoints(tmp_path: Path) -> None:
-    dest = _run_copier(
-        tmp_path,
-        {
-            "project_name": "No Entry Points",
-            "description": "No entrypoints",
-            "author": "Test Author",
-            "project_slug": "no_entry",
-            "python_min": "3.11",
-            "use_entrypoints": "false",
-            "license_year": "2026",
-        },
-    )
+    def use(project_root: Path, slug: str) -> None:
+        # Load the top-level package straight from its file and register it;
+        # submodules then resolve through its __path__ without touching sys.path.
+        package_dir = project_root / "src" / slug
+        spec = importlib.util.spec_from_file_location(
+            slug,
+            package_dir / "__init__.py",
+            submodule_search_locations=[str(package_dir)],
+        )
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[slug] = module
+        slugs.append(slug)
+        spec.loader.exec_module(module)
+
+    yield use
+    # Only modules imported during the test can belong to the project; leave
+    # anything else it pulled in (click.testing, ...) loaded for later tests.
+    prefixes = tuple(slugs)
+    for name in sys.modules.keys() - before:
+        if name.startswith(prefixes):
+            sys.modules.pop(name, None)
+
+
+@pytest.mark.parametrize(
+    ("data", "present", "absent"),
+    [
+        pytest.param(
+            {
+                **_BASE_DATA,
+                "project_name": "Sample CLI",
+                "project_slug": "sample_cli",
+                "use_entrypoints": "true",
+            },
+            (_SAMPLE_NAME, _SAMPLE_ENTRY_POINTS),
+            (),
+            id="with-entrypoints",
+        ),
+        pytest.param(
+            {
+                **_BASE_DATA,
+                "project_name": "No Entry Points",
+                "project_slug": "no_entry",
+            },
+            (_NO_ENTRY_NAME,),
+            (_NO_ENTRY_ENTRY_POINTS,),
+            id="without-entrypoints",
+        ),
+    ],
+)
+def test_template_renders(
+    tmp_path: Path,
+    _render_cache: Renderer,
+    data: dict[str, str],
+    present: tuple[str, ...],
+    absent: tuple[str, ...],
+) -> None:
+    project_root = _copy_rendered(tmp_path, data, _render_cache)
 
-    project_root = _project_root(dest)
     pyproject = _read(project_root / "pyproject.toml")
-    assert '[project.entry-points."no_entry.plugins"]' not in pyproject
+    for needle in present:
+        assert needle in pyproject
+    for needle in absent:
+        assert needle not in pyproject
+
+    cli = _read(project_root / "src" / data["project_slug"] / "cli.py")
+    assert _UNRENDERED_SLUG not in cli
+    for needle in _CLI_NEEDLES:
+        assert needle in cli
+
+    assert (project_root / "README.md").exists()
+    assert (project_root / "LICENSE").exists()
 
 
-def test_ingest_handles_path_io(tmp_path: Path) -> None:
-    dest = _run_copier(
+def test_ingest_handles_path_io(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter, hello_file: Path
+) -> None:
+    project_root = _copy_rendered(
         tmp_path,
         {
+            **_BASE_DATA,
             "project_name": "IO CLI",
-            "description": "IO test",
-            "author": "Test Author",
             "project_slug": "io_cli",
-            "python_min": "3.11",
-            "use_entrypoints": "false",
-            "license_year": "2026",
         },
+        _render_cache,
     )
 
-    project_root = _project_root(dest)
-    package_root = project_root / "src"
-    sys.path.insert(0, str(package_root))
-
-    try:
-        load_plugins = importlib.import_module("io_cli.core.plugins").load_plugins
-        build_cli = importlib.import_module("io_cli.core.click_factory").build_cli
-        from click.testing import CliRunner
-
-        data_file = tmp_path / "data.txt"
-        data_file.write_text("hello", encoding="utf-8")
-
-        load_plugins("io_cli.plugins")
-        cli = build_cli("io_cli")
-
-        runner = CliRunner()
-        result = runner.invoke(
-            cli,
-            [
-                "--output",
-                "json",
-                "ingest",
-                "users",
-                str(data_file),
-            ],
-        )
+    use_project(project_root, "io_cli")
+    load_plugins = _cached_import("io_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("io_cli.core.click_factory", "build_cli")
+
+    load_plugins("io_cli.plugins")
+    cli = build_cli("io_cli")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "--output",
+            "json",
+            "ingest",
+            "users",
+            str(hello_file),
+        ],
+    )
 
-        assert result.exit_code == 0
-        payload = json.loads(result.output.strip())
-        assert payload.get("ok") is True
-        events = payload.get("events", [])
-        assert events
-        assert events[0].get("kind") == "ingest"
-        assert events[0].get("details", {}).get("bytes") == 5
-    finally:
-        sys.path.pop(0)
-        _purge_modules("io_cli")
+    assert result.exit_code == 0
+    payload = json.loads(result.stdout_bytes)
+    assert payload.get("ok") is True
+    events = payload.get("events", [])
+    assert events
+    assert events[0].get("kind") == "ingest"
+    assert events[0].get("details", {}).get("bytes") == 5
 
 
-def test_main_propagates_exit_codes(tmp_path: Path) -> None:
-    dest = _run_copier(
+def test_main_propagates_exit_codes(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter, hello_file: Path
+) -> None:
+    project_root = _copy_rendered(
         tmp_path,
         {
+            **_BASE_DATA,
             "project_name": "Exit Code CLI",
-            "description": "Exit handling",
-            "author": "Test Author",
             "project_slug": "exit_cli",
-            "python_min": "3.11",
-            "use_entrypoints": "false",
-            "license_year": "2026",
         },
+        _render_cache,
     )
 
-    project_root = _project_root(dest)
-    package_root = project_root / "src"
-    data_file = tmp_path / "data.txt"
-    data_file.write_text("hello", encoding="utf-8")
+    use_project(project_root, "exit_cli")
+    main = _cached_import("exit_cli.cli", "main")
+    assert main(["check"]) == 1
+    assert main(["ingest", "users", str(hello_file)]) == 0
 
-    sys.path.insert(0, str(package_root))
-    try:
-        cli_mod = importlib.import_module("exit_cli.cli")
-        assert cli_mod.main(["check"]) == 1
-        assert cli_mod.main(["ingest", "users", str(data_file)]) == 0
-    finally:
-        sys.path.pop(0)
-        _purge_modules("exit_cli")
 
-
-def test_optional_io_parameters_are_opened(tmp_path: Path) -> None:
-    dest = _run_copier(
+def test_optional_io_parameters_are_opened(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
         tmp_path,
         {
+            **_BASE_DATA,
             "project_name": "IO Optional CLI",
-            "description": "IO optional test",
-            "author": "Test Author",
             "project_slug": "io_optional_cli",
-            "python_min": "3.11",
-            "use_entrypoints": "false",
-            "license_year": "2026",
         },
+        _render_cache,
     )
 
-    project_root = _project_root(dest)
-    package_root = project_root / "src"
-    plugin_path = package_root / "io_optional_cli" / "plugins" / "optional_file.py"
+    plugin_path = project_root / "src" / "io_optional_cli" / "plugins" / "optional_file.py"
     plugin_path.write_text(
         textwrap.dedent(
             """
@@ -226,72 +298,63 @@ def test_optional_io_parameters_are_opened(tmp_path: Path) -> None:
         encoding="utf-8",
     )
 
-    sys.path.insert(0, str(package_root))
-
-    try:
-        load_plugins = importlib.import_module("io_optional_cli.core.plugins").load_plugins
-        build_cli = importlib.import_module("io_optional_cli.core.click_factory").build_cli
-        from click.testing import CliRunner
+    use_project(project_root, "io_optional_cli")
+    load_plugins = _cached_import("io_optional_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("io_optional_cli.core.click_factory", "build_cli")
 
-        load_plugins("io_optional_cli.plugins")
-        cli = build_cli("io_optional_cli")
+    load_plugins("io_optional_cli.plugins")
+    cli = build_cli("io_optional_cli")
 
-        runner = CliRunner()
+    runner = CliRunner()
 
-        result = runner.invoke(
-            cli,
-            [
-                "--output",
-                "json",
-                "optional_file",
-            ],
-        )
+    result = runner.invoke(
+        cli,
+        [
+            "--output",
+            "json",
+            "optional_file",
+        ],
+    )
 
-        assert result.exit_code == 0
-        payload = json.loads(result.output.strip())
-        assert payload.get("ok") is True
-        events = payload.get("events", [])
-        assert events and events[0].get("kind") == "noop"
-
-        data_file = tmp_path / "optional-data.txt"
-        data_file.write_text("abc", encoding="utf-8")
-        result = runner.invoke(
-            cli,
-            [
-                "--output",
-                "json",
-                "optional_file",
-                "--data-file",
-                str(data_file),
-            ],
-        )
+    assert result.exit_code == 0
+    payload = json.loads(result.stdout_bytes)
+    assert payload.get("ok") is True
+    events = payload.get("events", [])
+    assert events and events[0].get("kind") == "noop"
+
+    data_file = tmp_path / "optional-data.txt"
+    data_file.write_text("abc", encoding="utf-8")
+    result = runner.invoke(
+        cli,
+        [
+            "--output",
+            "json",
+            "optional_file",
+            "--data-file",
+            str(data_file),
+        ],
+    )
 
-        assert result.exit_code == 0
-        payload = json.loads(result.output.strip())
-        events = payload.get("events", [])
-        assert events and events[0].get("details", {}).get("bytes") == 3
-    finally:
-        sys.path.pop(0)
-        _purge_modules("io_optional_cli")
+    assert result.exit_code == 0
+    payload = json.loads(result.stdout_bytes)
+    events = payload.get("events", [])
+    assert events and events[0].get("details", {}).get("bytes") == 3
 
 
-def test_command_failure_returns_nonzero(tmp_path: Path) -> None:
-    dest = _run_copier(
+def test_command_failure_returns_nonzero(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
         tmp_path,
         {
+            **_BASE_DATA,
             "project_name": "Error CLI",
-            "description": "Error test",
-            "author": "Test Author",
             "project_slug": "error_cli",
-            "python_min": "3.11",
-            "use_entrypoints": "false",
-            "license_year": "2026",
         },
+        _render_cache,
     )
 
-    project_root = _project_root(dest)
-    package_root = project_root / "src"
-    plugin_path = package_root / "error_cli" / "plugins" / "fail.py"
+    plugin_path = project_root / "src" / "error_cli" / "plugins" / "fail.py"
     plugin_path.write_text(
         textwrap.dedent(
             """
@@ -307,73 +370,416 @@ def test_command_failure_returns_nonzero(tmp_path: Path) -> None:
         encoding="utf-8",
     )
 
-    sys.path.insert(0, str(package_root))
+    use_project(project_root, "error_cli")
+    load_plugins = _cached_import("error_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("error_cli.core.click_factory", "build_cli")
+
+    load_plugins("error_cli.plugins")
+    cli = build_cli("error_cli")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "--output",
+            "json",
+            "fail",
+        ],
+    )
 
-    try:
-        load_plugins = importlib.import_module("error_cli.core.plugins").load_plugins
-        build_cli = importlib.import_module("error_cli.core.click_factory").build_cli
-        from click.testing import CliRunner
+    assert result.exit_code == 70
+    payload = json.loads(result.stdout_bytes)
+    assert payload.get("ok") is False
+    events = payload.get("events", [])
+    assert events and events[0].get("kind") == "error"
 
-        load_plugins("error_cli.plugins")
-        cli = build_cli("error_cli")
 
-        runner = CliRunner()
-        result = runner.invoke(
-            cli,
-            [
-                "--output",
-                "json",
-                "fail",
-            ],
-        )
+def test_usage_error_returns_two(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "Usage CLI",
+            "project_slug": "usage_cli",
+        },
+        _render_cache,
+    )
+
+    use_project(project_root, "usage_cli")
+    load_plugins = _cached_import("usage_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("usage_cli.core.click_factory", "build_cli")
+
+    load_plugins("usage_cli.plugins")
+    cli = build_cli("usage_cli")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "ingest",
+        ],
+    )
 
-        assert result.exit_code == 70
-        payload = json.loads(result.output.strip())
-        assert payload.get("ok") is False
-        events = payload.get("events", [])
-        assert events and events[0].get("kind") == "error"
-    finally:
-        sys.path.pop(0)
-        _purge_modules("error_cli")
+    # Click usage errors should exit 2
+    assert result.exit_code == 2
 
 
-def test_usage_error_returns_two(tmp_path: Path) -> None:
-    dest = _run_copier(
+def test_forward_referenced_enum_annotations_resolve(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
         tmp_path,
         {
-            "project_name": "Usage CLI",
-            "description": "Usage test",
-            "author": "Test Author",
-            "project_slug": "usage_cli",
-            "python_min": "3.11",
-            "use_entrypoints": "false",
-            "license_year": "2026",
+            **_BASE_DATA,
+            "project_name": "Forward Ref CLI",
+            "project_slug": "forward_ref_cli",
         },
+        _render_cache,
     )
 
-    project_root = _project_root(dest)
-    package_root = project_root / "src"
+    plugin_path = project_root / "src" / "forward_ref_cli" / "plugins" / "paint.py"
+    plugin_path.write_text(
+        textwrap.dedent(
+            """
+            from __future__ import annotations
 
-    sys.path.insert(0, str(package_root))
+            from enum import Enum
 
-    try:
-        load_plugins = importlib.import_module("usage_cli.core.plugins").load_plugins
-        build_cli = importlib.import_module("usage_cli.core.click_factory").build_cli
-        from click.testing import CliRunner
+            from ..core.dispatch import command
+            from ..core.errors import ErrorCode
+            from ..core.results import ResultObject
 
-        load_plugins("usage_cli.plugins")
-        cli = build_cli("usage_cli")
 
-        runner = CliRunner()
-        result = runner.invoke(
-            cli,
-            [
-                "ingest",
-            ],
-        )
+            @command()
+            def paint(results: ResultObject, *, shade: Shade, count: int = 1) -> None:
+                results.add_event(
+                    "paint",
+                    code=ErrorCode.OK,
+                    details={"shade": shade.value, "count": count},
+                )
+
+
+            class Shade(str, Enum):
+                LIGHT = "light"
+                DARK = "dark"
+            """
+        ).strip(),
+        encoding="utf-8",
+    )
+
+    use_project(project_root, "forward_ref_cli")
+    load_plugins = _cached_import("forward_ref_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("forward_ref_cli.core.click_factory", "build_cli")
+
+    load_plugins("forward_ref_cli.plugins")
+    cli = build_cli("forward_ref_cli")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["paint", "--help"])
+    assert result.exit_code == 0
+    assert "{light|dark}" in result.output
+    assert "INTEGER" in result.output
+
+    result = runner.invoke(cli, ["--output", "json", "paint", "dark", "--count", "2"])
+    assert result.exit_code == 0
+    payload = json.loads(result.stdout_bytes)
+    assert payload.get("ok") is True
+    events = payload.get("events", [])
+    assert events and events[0].get("details") == {"shade": "dark", "count": 2}
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_json_output_edge_payloads_on_both_backends(
+    tmp_path: Path,
+    _render_cache: Renderer,
+    use_project: ProjectImporter,
+    monkeypatch: pytest.MonkeyPatch,
+    backend: str,
+) -> None:
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "JSON CLI",
+            "project_slug": "json_cli",
+        },
+        _render_cache,
+    )
+
+    plugin_path = project_root / "src" / "json_cli" / "plugins" / "emit.py"
+    plugin_path.write_text(
+        textwrap.dedent(
+            """
+            from datetime import datetime
+
+            from ..core.dispatch import command
+            from ..core.errors import ErrorCode
+            from ..core.results import ResultObject
+
+
+            @command(positional=False)
+            def emit(results: ResultObject, *, big: bool = False) -> None:
+                details = {1: "a", "name": "caf\\u00e9", "when": datetime(2026, 1, 2, 3, 4, 5)}
+                if big:
+                    details["n"] = 2**70
+                results.add_event("emit", code=ErrorCode.OK, details=details)
+            """
+        ).strip(),
+        encoding="utf-8",
+    )
+
+    use_project(project_root, "json_cli")
+    load_plugins = _cached_import("json_cli.core.plugins", "load_plugins")
+    click_factory = importlib.import_module("json_cli.core.click_factory")
+    if backend == "json":
+        monkeypatch.setattr(click_factory, "orjson", None)
+
+    load_plugins("json_cli.plugins")
+    cli = click_factory.build_cli("json_cli")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--output", "json", "emit"])
+    assert result.exit_code == 0
+    events = json.loads(result.stdout_bytes).get("events", [])
+    assert events and events[0].get("details") == {
+        "1": "a",
+        "name": "café",
+        "when": "2026-01-02 03:04:05",
+    }
+
+    result = runner.invoke(cli, ["--output", "json", "emit", "--big"])
+    assert result.exit_code == 0
+    events = json.loads(result.stdout_bytes).get("events", [])
+    assert events and events[0].get("details") == {
+        "1": "a",
+        "name": "café",
+        "when": "2026-01-02 03:04:05",
+        "n": 2**70,
+    }
+
+    # A non-UTF-8 stdout gets ASCII escapes instead of raw UTF-8 bytes.
+    result = CliRunner(charset="latin-1").invoke(cli, ["--output", "json", "emit"])
+    assert result.exit_code == 0
+    assert b"caf\\u00e9" in result.stdout_bytes
+    events = json.loads(result.stdout_bytes).get("events", [])
+    assert events and events[0].get("details") == {
+        "1": "a",
+        "name": "café",
+        "when": "2026-01-02 03:04:05",
+    }
+
+
+def test_run_returns_event_tuples(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter, hello_file: Path
+) -> None:
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "Run CLI",
+            "project_slug": "run_cli",
+        },
+        _render_cache,
+    )
+
+    use_project(project_root, "run_cli")
+    run = _cached_import("run_cli.cli", "run")
+    Event = _cached_import("run_cli.core.results", "Event")
+
+    results, code = run(["--quiet", "ingest", "users", str(hello_file)])
+    assert code == 0
+    assert results.ok is True
+    [ev] = results.events
+    assert isinstance(ev, Event)
+    assert (ev.kind, ev.code, ev.code_num) == ("ingest", "OK", 0)
+    assert ev.details == {"data_type": "users", "bytes": 5}
+    assert ev.to_dict()["details"] == ev.details
+
+    results, code = run(["--quiet", "check"])
+    assert code == 1
+    assert results.ok is False
+    [ev] = results.events
+    assert (ev.kind, ev.code) == ("error", "E_CONFIG_MISSING")
+
+    results = _cached_import("run_cli.core.results", "ResultObject")()
+    results.add_event("bare")
+    [ev] = results.events
+    assert ev.details is None
+    assert ev.to_dict()["details"] == {}
+
+
+def test_run_picks_up_handlers_registered_later(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "Late CLI",
+            "project_slug": "late_cli",
+        },
+        _render_cache,
+    )
+
+    use_project(project_root, "late_cli")
+    cli_module = importlib.import_module("late_cli.cli")
+    command = _cached_import("late_cli.core.dispatch", "command")
+
+    _, code = cli_module.run(["late"])
+    assert code == 1  # unknown command
+    first = cli_module._CLI_CACHE["late_cli"][1]
+
+    @command()
+    def late(results: Any) -> None:
+        results.add_event("late")
+
+    results, code = cli_module.run(["--quiet", "late"])
+    assert code == 0
+    assert [ev.kind for ev in results.events] == ["late"]
+    # The stale group is replaced, not kept alongside the new one.
+    assert list(cli_module._CLI_CACHE) == ["late_cli"]
+    assert cli_module._CLI_CACHE["late_cli"][1] is not first
+
+
+def test_text_output_strips_styles_when_not_a_tty(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "Style CLI",
+            "project_slug": "style_cli",
+        },
+        _render_cache,
+    )
+
+    plugin_path = project_root / "src" / "style_cli" / "plugins" / "styled.py"
+    plugin_path.write_text(
+        textwrap.dedent(
+            """
+            import click
+
+            from ..core.dispatch import command
+            from ..core.results import ResultObject
 
-        # Click usage errors should exit 2
-        assert result.exit_code == 2
-    finally:
-        sys.path.pop(0)
-        _purge_modules("usage_cli")
+
+            @command()
+            def styled(results: ResultObject) -> None:
+                results.add_event("styled", message=click.style("hi", fg="green"))
+                results.add_event("done")
+            """
+        ).strip(),
+        encoding="utf-8",
+    )
+
+    use_project(project_root, "style_cli")
+    load_plugins = _cached_import("style_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("style_cli.core.click_factory", "build_cli")
+
+    load_plugins("style_cli.plugins")
+    cli = build_cli("style_cli")
+
+    result = CliRunner().invoke(cli, ["styled"])
+    assert result.exit_code == 0
+    assert result.output == "[styled] hi\n[done]\n"
+
+
+def test_malformed_handler_fails_cli_build(
+    tmp_path: Path, _render_cache: Renderer, use_project: ProjectImporter
+) -> None:
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "Malformed CLI",
+            "project_slug": "malformed_cli",
+        },
+        _render_cache,
+    )
+
+    plugin_path = project_root / "src" / "malformed_cli" / "plugins" / "shapes.py"
+    plugin_path.write_text(
+        textwrap.dedent(
+            """
+            from ..core.dispatch import command
+            from ..core.results import ResultObject
+
+
+            @command()
+            def good1(results: ResultObject) -> None:
+                results.add_event("good1")
+
+
+            @command()
+            def bad(results: ResultObject, x: int) -> None:
+                results.add_event("bad")
+
+
+            @command()
+            def good2(results: ResultObject) -> None:
+                results.add_event("good2")
+            """
+        ).strip(),
+        encoding="utf-8",
+    )
+
+    use_project(project_root, "malformed_cli")
+    load_plugins = _cached_import("malformed_cli.core.plugins", "load_plugins")
+    build_cli = _cached_import("malformed_cli.core.click_factory", "build_cli")
+    dispatch = importlib.import_module("malformed_cli.core.dispatch")
+
+    # The whole module imports; the bad shape is reported when the CLI is built.
+    load_plugins("malformed_cli.plugins")
+    assert {"good1", "bad", "good2"} <= dispatch.DISPATCH.keys()
+
+    with pytest.raises(dispatch.RegistrationError, match="bad: params after results"):
+        build_cli("malformed_cli")
+
+
+@pytest.mark.parametrize(
+    "ns",
+    [
+        pytest.param(1_700_000_000_123_456_789, id="sub-second"),
+        pytest.param(1_700_000_000_987_654_000, id="same-second-cached-prefix"),
+        pytest.param(1_700_000_001_000_000_000, id="on-the-second"),
+        pytest.param(1_700_000_001_000_000_999, id="sub-microsecond"),
+    ],
+)
+def test_event_timestamps_match_datetime_isoformat(
+    tmp_path: Path,
+    _render_cache: Renderer,
+    use_project: ProjectImporter,
+    monkeypatch: pytest.MonkeyPatch,
+    ns: int,
+) -> None:
+    project_root = _copy_rendered(
+        tmp_path,
+        {
+            **_BASE_DATA,
+            "project_name": "Time CLI",
+            "project_slug": "time_cli",
+        },
+        _render_cache,
+    )
+
+    use_project(project_root, "time_cli")
+    results_module = importlib.import_module("time_cli.core.results")
+    # Prime the per-second cache with a neighbouring second first.
+    monkeypatch.setattr(results_module.time, "time_ns", lambda: 1_700_000_000_500_000_000)
+    results_module._utc_timestamp()
+    monkeypatch.setattr(results_module.time, "time_ns", lambda: ns)
+
+    sec, rem = divmod(ns, 1_000_000_000)
+    expected = (
+        datetime.fromtimestamp(sec, timezone.utc)
+        .replace(microsecond=rem // 1000)
+        .isoformat()
+        .replace("+00:00", "Z")
+    )
+    assert results_module._utc_timestamp() == expected